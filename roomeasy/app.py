@@ -1,23 +1,107 @@
 import os
-import random
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from supabase import create_client, Client
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-app = Flask(__name__)
-app.secret_key = "super_secret_key_change_this"
-
-# Initialize Supabase
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_KEY")
-
-if not url or not key:
-    raise ValueError("Please set SUPABASE_URL and SUPABASE_KEY in .env file")
-
-supabase: Client = create_client(url, key)
+import threading
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, session, flash, jsonify
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
+from ranking import RankingEngine
+from ratelimit import RateLimiter, RedisBackend, rate_limit
+from sessions import MemoryStore, SQLiteStore, ServerSideSessionInterface
+
+main = Blueprint('main', __name__)
+
+# --- Supabase Client ---
+# The client is built on first use rather than at import time, and once per
+# process, so gunicorn workers forked from a preloaded master each get their
+# own connection pool.
+
+class _ClientHolder:
+    def __init__(self, factory):
+        self.factory = factory
+        self.client = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.client is None or self.pid != os.getpid():
+            with self.lock:
+                if self.client is None or self.pid != os.getpid():
+                    self.client = self.factory()
+                    self.pid = os.getpid()
+        return self.client
+
+def get_supabase(app=None):
+    return (app or current_app).extensions['supabase'].get()
+
+def _create_supabase_client():
+    from supabase import create_client
+
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("Please set SUPABASE_URL and SUPABASE_KEY in .env file")
+    return create_client(url, key)
+
+# Per-app objects, looked up on the current app so routes can keep calling
+# supabase.table(...) and ranking.pick(...).
+supabase = LocalProxy(get_supabase)
+ranking = LocalProxy(lambda: current_app.extensions['ranking'])
+limiter = LocalProxy(lambda: current_app.extensions['limiter'])
+
+# --- App Factory ---
+
+def create_app(config=None):
+    """Build a new app. Use `gunicorn 'app:create_app()'` or `flask --app app run`."""
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SECRET_KEY", "super_secret_key_change_this")
+    if config:
+        app.config.update(config)
+
+    # Behind a reverse proxy, set TRUSTED_PROXY_HOPS to the number of proxies so
+    # request.remote_addr (used by the rate limiter) is the real client. Off by
+    # default: with clients connecting to gunicorn directly, a forged
+    # X-Forwarded-For would give every request a fresh rate-limit bucket.
+    hops = int(app.config.get('TRUSTED_PROXY_HOPS', os.environ.get('TRUSTED_PROXY_HOPS', 0)))
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    app.extensions['supabase'] = _ClientHolder(app.config.get('SUPABASE_CLIENT_FACTORY') or _create_supabase_client)
+    app.extensions['ranking'] = RankingEngine(lambda: get_supabase(app),
+                                              ttl=app.config.get('RANKING_REFRESH_SECONDS', 300))
+
+    # RATE_LIMITS overrides per-route budgets, e.g. {'login': (0.1, 5)}
+    backend = None
+    if app.config.get('RATE_LIMIT_REDIS_URL'):
+        backend = RedisBackend(app.config['RATE_LIMIT_REDIS_URL'])
+    app.extensions['limiter'] = RateLimiter(backend, budgets=app.config.get('RATE_LIMITS'))
+
+    # Sessions live server-side; the cookie only holds the session id.
+    # SESSION_STORE is 'sqlite' (shared by all workers on the host) or 'memory'.
+    if app.config.get('SESSION_STORE', 'sqlite') == 'memory':
+        store = MemoryStore()
+    else:
+        os.makedirs(app.instance_path, exist_ok=True)
+        store = SQLiteStore(app.config.get('SESSION_SQLITE_PATH') or os.path.join(app.instance_path, 'sessions.sqlite3'))
+    app.session_interface = ServerSideSessionInterface(store)
+
+    # Development only: record and check each route's queries (needs localdb.LocalClient).
+    if app.config.get('QUERY_AUDIT'):
+        from query_audit import QueryAuditor
+
+        auditor = QueryAuditor(app.config.get('QUERY_BUDGETS'))
+        auditor.init_app(app, get_supabase(app))
+        app.extensions['query_audit'] = auditor
+
+    app.register_blueprint(main)
+
+    # Compile every template once at boot; with preload_app the compiled
+    # templates are shared by all forked workers.
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    return app
 
 # --- Authentication Decorators ---
 
@@ -25,7 +109,7 @@ def login_required(f):
     def wrap(*args, **kwargs):
         if 'user' not in session:
             flash("You need to login first!", "error")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     wrap.__name__ = f.__name__
     return wrap
@@ -35,10 +119,10 @@ def verified_required(f):
     def wrap(*args, **kwargs):
         if 'user' not in session:
             flash("You need to login first!", "error")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         if not session.get('is_verified'):
             flash("You need to verify your identity before performing this action.", "error")
-            return redirect(url_for('verification_pending'))
+            return redirect(url_for('main.verification_pending'))
         return f(*args, **kwargs)
     wrap.__name__ = f.__name__
     return wrap
@@ -48,43 +132,49 @@ def admin_required(f):
     def wrap(*args, **kwargs):
         if 'user' not in session:
             flash("Admin login required.", "error")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         if session.get('role') != 'admin':
             flash("Access denied. Admins only.", "error")
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     wrap.__name__ = f.__name__
     return wrap
 
+# --- Availability Summary ---
+
+def sort_by_price(buildings, order):
+    """Sort on the stored min_price; buildings with nothing available go last."""
+    if order not in ('price_asc', 'price_desc'):
+        return buildings
+    priced = [b for b in buildings if b.get('available_rooms') and b.get('min_price') is not None]
+    unpriced = [b for b in buildings if not (b.get('available_rooms') and b.get('min_price') is not None)]
+    priced.sort(key=lambda b: float(b['min_price']), reverse=(order == 'price_desc'))
+    return priced + unpriced
+
 # --- Routes ---
 
-@app.route('/')
+@main.route('/')
+@rate_limit('search', rate=1, burst=10, when=lambda: request.args.get('q'))
 def index():
     search_query = request.args.get('q', '').strip()
+    sort = request.args.get('sort', '')
     
     featured_buildings = []
     recommended_buildings = []
     all_buildings = []
     
     try:
-        base_query = supabase.table('buildings').select("*")
-        
         if search_query:
             session['user_location'] = search_query
             filter_condition = f"address.ilike.%{search_query}%,title.ilike.%{search_query}%,city.ilike.%{search_query}%"
-            response = base_query.or_(filter_condition).execute()
+            response = supabase.table('buildings').select("*").or_(filter_condition).execute()
             all_buildings = response.data
         else:
-            response = base_query.execute()
-            all_buildings = response.data
-            
-            if len(all_buildings) > 0:
-                featured_buildings = random.sample(all_buildings, min(len(all_buildings), 5))
-                remaining = [b for b in all_buildings if b not in featured_buildings]
-                if remaining:
-                    recommended_buildings = random.sample(remaining, min(len(remaining), 8))
-                else:
-                    recommended_buildings = all_buildings[:8]
+            all_buildings = supabase.table('buildings').select("*").execute().data
+            featured_buildings = ranking.pick(5)
+            recommended_buildings = ranking.pick(8, location=session.get('user_location'),
+                                                 exclude=[b['id'] for b in featured_buildings])
+        all_buildings = sort_by_price(all_buildings, sort)
 
     except Exception as e:
         print(f"Error fetching buildings: {e}")
@@ -94,22 +184,23 @@ def index():
                            buildings=all_buildings, 
                            featured_buildings=featured_buildings,
                            recommended_buildings=recommended_buildings,
-                           search_query=search_query)
+                           search_query=search_query,
+                           sort=sort)
 
-@app.route('/building/<int:building_id>')
+@main.route('/building/<int:building_id>')
 def building_details(building_id):
     try:
         b_res = supabase.table('buildings').select("*").eq('id', building_id).single().execute()
         building = b_res.data
-        r_res = supabase.table('rooms').select("*").eq('building_id', building_id).eq('status', 'available').execute()
+        r_res = supabase.table('rooms').select("*").eq('building_id', building_id).eq('status', 'available').order('price_per_month').execute()
         rooms = r_res.data
         return render_template('building_details.html', building=building, rooms=rooms)
     except Exception as e:
         print(f"Error: {e}")
         flash("Building not found", "error")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
-@app.route('/upload', methods=['GET', 'POST'])
+@main.route('/upload', methods=['GET', 'POST'])
 @verified_required
 def upload():
     if request.method == 'POST':
@@ -133,18 +224,19 @@ def upload():
         }
         try:
             res = supabase.table('buildings').insert(data).execute()
+            ranking.invalidate()
             if res.data:
                 new_id = res.data[0]['id']
                 flash("Building listed! Now add rooms to it.", "success")
-                return redirect(url_for('building_details', building_id=new_id))
-            return redirect(url_for('index'))
+                return redirect(url_for('main.building_details', building_id=new_id))
+            return redirect(url_for('main.index'))
         except Exception as e:
             flash(f"Error uploading building: {e}", "error")
 
     return render_template('upload.html')
 
 # --- Edit Building Route ---
-@app.route('/edit_building/<int:building_id>', methods=['GET', 'POST'])
+@main.route('/edit_building/<int:building_id>', methods=['GET', 'POST'])
 @verified_required
 def edit_building(building_id):
     try:
@@ -152,11 +244,11 @@ def edit_building(building_id):
         building = response.data
     except Exception as e:
         flash("Building not found.", "error")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     if str(building['owner_id']) != str(session['user']):
         flash("You can only edit your own buildings.", "error")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         title = request.form.get('title')
@@ -179,14 +271,15 @@ def edit_building(building_id):
         }
         try:
             supabase.table('buildings').update(data).eq('id', building_id).execute()
+            ranking.invalidate()
             flash("Building updated successfully!", "success")
-            return redirect(url_for('building_details', building_id=building_id))
+            return redirect(url_for('main.building_details', building_id=building_id))
         except Exception as e:
             flash(f"Error updating building: {e}", "error")
 
     return render_template('edit_building.html', building=building)
 
-@app.route('/add_room/<int:building_id>', methods=['GET', 'POST'])
+@main.route('/add_room/<int:building_id>', methods=['GET', 'POST'])
 @verified_required
 def add_room(building_id):
     try:
@@ -194,9 +287,9 @@ def add_room(building_id):
         building = b_res.data
         if building['owner_id'] != session['user']:
             flash("You can only add rooms to your own buildings.", "error")
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
     except:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         title = request.form.get('title')
@@ -227,15 +320,16 @@ def add_room(building_id):
         }
         try:
             supabase.table('rooms').insert(data).execute()
+            ranking.invalidate()
             flash("Room added successfully!", "success")
-            return redirect(url_for('building_details', building_id=building_id))
+            return redirect(url_for('main.building_details', building_id=building_id))
         except Exception as e:
             flash(f"Error adding room: {e}", "error")
 
     return render_template('add_room.html', building=building)
 
 # --- Edit Room Route ---
-@app.route('/edit_room/<int:room_id>', methods=['GET', 'POST'])
+@main.route('/edit_room/<int:room_id>', methods=['GET', 'POST'])
 @verified_required
 def edit_room(room_id):
     try:
@@ -243,11 +337,11 @@ def edit_room(room_id):
         room = response.data
     except Exception as e:
         flash("Room not found.", "error")
-        return redirect(url_for('profile'))
+        return redirect(url_for('main.profile'))
 
     if str(room['owner_id']) != str(session['user']):
         flash("You can only edit your own rooms.", "error")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         try:
@@ -268,15 +362,16 @@ def edit_room(room_id):
                 "more_images": more_images
             }
             supabase.table('rooms').update(update_data).eq('id', room_id).execute()
+            ranking.invalidate()
             flash("Room updated successfully!", "success")
-            return redirect(url_for('room_details', room_id=room_id))
+            return redirect(url_for('main.room_details', room_id=room_id))
         except Exception as e:
             flash(f"Error updating room: {e}", "error")
 
     return render_template('edit_room.html', room=room)
 
 
-@app.route('/room/<int:room_id>')
+@main.route('/room/<int:room_id>')
 def room_details(room_id):
     try:
         response = supabase.table('rooms').select("*").eq('id', room_id).single().execute()
@@ -321,9 +416,9 @@ def room_details(room_id):
     except Exception as e:
         print(f"Room details error: {e}")
         flash("Room not found.", "error")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
-@app.route('/wishlist')
+@main.route('/wishlist')
 @login_required
 def wishlist():
     user_id = session['user']
@@ -337,9 +432,10 @@ def wishlist():
             rooms = []
         return render_template('wishlist.html', rooms=rooms)
     except Exception as e:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
-@app.route('/toggle_wishlist/<int:room_id>', methods=['POST'])
+@main.route('/toggle_wishlist/<int:room_id>', methods=['POST'])
+@rate_limit('wishlist', rate=1, burst=10, json=True)
 def toggle_wishlist(room_id):
     if 'user' not in session: return jsonify({'status': 'error', 'message': 'Login required'}), 401
     user_id = session['user']
@@ -354,7 +450,7 @@ def toggle_wishlist(room_id):
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/signup', methods=['GET', 'POST'])
+@main.route('/signup', methods=['GET', 'POST'])
 def signup():
     if request.method == 'POST':
         full_name = request.form.get('full_name')
@@ -365,7 +461,7 @@ def signup():
             existing_user = supabase.table('user_profiles').select("*").eq('email', email).execute()
             if existing_user.data:
                 flash("Email already registered. Please login.", "error")
-                return redirect(url_for('login'))
+                return redirect(url_for('main.login'))
             new_user_data = {
                 "full_name": full_name,
                 "email": email,
@@ -377,12 +473,13 @@ def signup():
             }
             supabase.table('user_profiles').insert(new_user_data).execute()
             flash("Signup successful! You can now login.", "success")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         except Exception as e:
             flash(f"Signup Error: {str(e)}", "error")
     return render_template('signup.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@main.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', rate=0.1, burst=5, when=lambda: request.method == 'POST')
 def login():
     if request.method == 'POST':
         email = request.form.get('email')
@@ -398,20 +495,20 @@ def login():
                 session['is_verified'] = user.get('is_verified', False)
                 session['verification_status'] = user.get('verification_status', 'none')
                 flash(f"Welcome back, {user['full_name']}!", "success")
-                return redirect(url_for('index'))
+                return redirect(url_for('main.index'))
             else:
                 flash("Invalid email or password", "error")
         except Exception as e:
             flash(f"Login Error: {str(e)}", "error")
     return render_template('login.html')
 
-@app.route('/logout')
+@main.route('/logout')
 def logout():
     session.clear()
     flash("You have been logged out.", "info")
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/profile')
+@main.route('/profile')
 @login_required
 def profile():
     user_id = session['user']
@@ -422,19 +519,26 @@ def profile():
         rooms_res = supabase.table('rooms').select("*").eq('owner_id', user_id).order('created_at', desc=True).execute()
         my_rooms = rooms_res.data
         
-        if my_rooms:
+        booked_ids = [room['id'] for room in my_rooms if room['status'] == 'booked']
+        if booked_ids:
+            # Latest booking per booked room, then their renters, in two queries.
+            b_res = supabase.table('bookings').select("room_id, user_id, booking_type, created_at").in_('room_id', booked_ids).order('created_at', desc=True).execute()
+            latest = {}
+            for booking in b_res.data:
+                latest.setdefault(booking['room_id'], booking)
+            renters = {}
+            if latest:
+                renter_ids = list({booking['user_id'] for booking in latest.values()})
+                renter_res = supabase.table('user_profiles').select("id, full_name, email").in_('id', renter_ids).execute()
+                renters = {str(r['id']): r for r in renter_res.data}
             for room in my_rooms:
-                if room['status'] == 'booked':
-                    b_res = supabase.table('bookings').select("*").eq('room_id', room['id']).order('created_at', desc=True).limit(1).execute()
-                    if b_res.data:
-                        booking = b_res.data[0]
-                        renter_res = supabase.table('user_profiles').select("*").eq('id', booking['user_id']).single().execute()
-                        if renter_res.data:
-                            renter = renter_res.data
-                            room['renter_name'] = renter.get('full_name', 'Unknown')
-                            room['renter_email'] = renter.get('email', 'Unknown')
-                            room['renter_phone'] = "Not Available"
-                            room['booking_type'] = booking.get('booking_type', 'standard')
+                booking = latest.get(room['id'])
+                renter = renters.get(str(booking['user_id'])) if booking else None
+                if renter:
+                    room['renter_name'] = renter.get('full_name', 'Unknown')
+                    room['renter_email'] = renter.get('email', 'Unknown')
+                    room['renter_phone'] = "Not Available"
+                    room['booking_type'] = booking.get('booking_type', 'standard')
 
         bookings_res = supabase.table('bookings').select("*").eq('user_id', user_id).order('created_at', desc=True).execute()
         my_bookings = bookings_res.data
@@ -486,12 +590,12 @@ def profile():
     except Exception as e:
         print(f"Profile error: {e}")
         flash(f"Error fetching profile: {e}", "error")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
 
 # --- Verification Routes ---
 
-@app.route('/request-verification', methods=['GET', 'POST'])
+@main.route('/request-verification', methods=['GET', 'POST'])
 @login_required
 def request_verification():
     user_id = session['user']
@@ -499,14 +603,14 @@ def request_verification():
     # If already verified, go home
     if session.get('is_verified'):
         flash("Your account is already verified!", "success")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     # Check if there's already a pending request
     try:
         existing = supabase.table('verification_requests').select("*").eq('user_id', user_id).eq('status', 'pending').execute()
         if existing.data:
             flash("You already have a pending verification request.", "info")
-            return redirect(url_for('verification_pending'))
+            return redirect(url_for('main.verification_pending'))
     except:
         pass
 
@@ -552,7 +656,7 @@ def request_verification():
             session['verification_status'] = 'pending'
             
             flash("Verification request submitted successfully! We'll review your documents shortly.", "success")
-            return redirect(url_for('verification_pending'))
+            return redirect(url_for('main.verification_pending'))
         except Exception as e:
             flash(f"Error submitting verification: {str(e)}", "error")
 
@@ -566,14 +670,14 @@ def request_verification():
     return render_template('verification_request.html', user=user_data)
 
 
-@app.route('/verification-pending')
+@main.route('/verification-pending')
 @login_required
 def verification_pending():
     user_id = session['user']
     
     # If already verified, redirect home
     if session.get('is_verified'):
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     # Fetch latest verification request
     verification_req = None
@@ -587,7 +691,7 @@ def verification_pending():
     # If no request submitted yet, redirect to form
     status = session.get('verification_status', 'none')
     if status == 'none' and not verification_req:
-        return redirect(url_for('request_verification'))
+        return redirect(url_for('main.request_verification'))
     
     return render_template('verification_pending.html', 
                            verification_req=verification_req,
@@ -596,7 +700,7 @@ def verification_pending():
 
 # --- Admin Routes ---
 
-@app.route('/admin')
+@main.route('/admin')
 @admin_required
 def admin_dashboard():
     try:
@@ -633,7 +737,7 @@ def admin_dashboard():
                            recent_verifications=recent_verifications.data)
 
 
-@app.route('/admin/verifications')
+@main.route('/admin/verifications')
 @admin_required
 def admin_verifications():
     status_filter = request.args.get('status', 'all')
@@ -663,7 +767,7 @@ def admin_verifications():
                            status_filter=status_filter)
 
 
-@app.route('/admin/verify/<int:req_id>', methods=['POST'])
+@main.route('/admin/verify/<int:req_id>', methods=['POST'])
 @admin_required
 def admin_verify(req_id):
     action = request.form.get('action')  # 'approve' or 'reject'
@@ -671,7 +775,7 @@ def admin_verify(req_id):
     
     if action not in ['approve', 'reject']:
         flash("Invalid action.", "error")
-        return redirect(url_for('admin_verifications'))
+        return redirect(url_for('main.admin_verifications'))
     
     try:
         # Get the verification request to find user_id
@@ -680,7 +784,7 @@ def admin_verify(req_id):
         
         if not v_req:
             flash("Verification request not found.", "error")
-            return redirect(url_for('admin_verifications'))
+            return redirect(url_for('main.admin_verifications'))
         
         user_id = v_req['user_id']
         new_status = 'approved' if action == 'approve' else 'rejected'
@@ -705,10 +809,10 @@ def admin_verify(req_id):
     except Exception as e:
         flash(f"Error processing verification: {e}", "error")
     
-    return redirect(url_for('admin_verifications'))
+    return redirect(url_for('main.admin_verifications'))
 
 
-@app.route('/admin/users')
+@main.route('/admin/users')
 @admin_required
 def admin_users():
     try:
@@ -721,7 +825,15 @@ def admin_users():
     return render_template('admin_users.html', users=users)
 
 
-@app.route('/admin/toggle-role/<user_id>', methods=['POST'])
+@main.route('/admin/rate-limits')
+@admin_required
+def admin_rate_limits():
+    """Allowed/limited counters per route for this worker, plus the budgets."""
+    budgets = {name: {'rate': rate, 'burst': burst} for name, (rate, burst) in limiter.budgets.items()}
+    return jsonify({'budgets': budgets, 'counters': limiter.stats()})
+
+
+@main.route('/admin/toggle-role/<user_id>', methods=['POST'])
 @admin_required
 def admin_toggle_role(user_id):
     """Toggle a user between 'user' and 'admin' role."""
@@ -730,13 +842,18 @@ def admin_toggle_role(user_id):
         current_role = u_res.data.get('role', 'user')
         new_role = 'admin' if current_role == 'user' else 'user'
         supabase.table('user_profiles').update({"role": new_role}).eq('id', user_id).execute()
+        # Sign the user out everywhere so the old role isn't kept in a session.
+        # Signed cookie sessions have no store to do that with.
+        store = getattr(current_app.session_interface, 'store', None)
+        if store is not None:
+            store.delete_user(user_id)
         flash(f"User role changed to {new_role}.", "success")
     except Exception as e:
         flash(f"Error changing role: {e}", "error")
-    return redirect(url_for('admin_users'))
+    return redirect(url_for('main.admin_users'))
 
 
-@app.route('/book/<int:room_id>', methods=['POST'])
+@main.route('/book/<int:room_id>', methods=['POST'])
 @verified_required
 def book_room(room_id):
     # Check if user is the owner
@@ -744,7 +861,7 @@ def book_room(room_id):
         room_res = supabase.table('rooms').select("owner_id").eq('id', room_id).single().execute()
         if room_res.data and str(room_res.data['owner_id']) == str(session['user']):
             flash("You cannot book your own property!", "error")
-            return redirect(url_for('room_details', room_id=room_id))
+            return redirect(url_for('main.room_details', room_id=room_id))
     except Exception as e:
         print(f"Error checking ownership: {e}")
 
@@ -753,14 +870,16 @@ def book_room(room_id):
     booking_data = { "user_id": session['user'], "room_id": room_id, "booking_type": booking_type, "amount_paid": float(amount) if amount else 0 }
     try:
         supabase.table('bookings').insert(booking_data).execute()
-        if booking_type in ['full', 'lock']: supabase.table('rooms').update({"status": "booked"}).eq("id", room_id).execute()
+        if booking_type in ['full', 'lock']:
+            supabase.table('rooms').update({"status": "booked"}).eq("id", room_id).execute()
+            ranking.invalidate()
         flash(f"Booking Successful! Type: {booking_type}", "success")
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     except Exception as e:
         flash(f"Booking failed: {e}", "error")
-        return redirect(url_for('room_details', room_id=room_id))
+        return redirect(url_for('main.room_details', room_id=room_id))
 
-@app.route('/pay_remainder/<int:booking_id>', methods=['POST'])
+@main.route('/pay_remainder/<int:booking_id>', methods=['POST'])
 @login_required
 def pay_remainder(booking_id):
     try:
@@ -769,11 +888,11 @@ def pay_remainder(booking_id):
         
         if not booking:
             flash("Booking not found.", "error")
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
             
         if str(booking['user_id']) != str(session['user']):
             flash("Unauthorized request.", "error")
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
             
         r_res = supabase.table('rooms').select("price_per_month").eq('id', booking['room_id']).single().execute()
         room_data = r_res.data
@@ -785,13 +904,14 @@ def pay_remainder(booking_id):
         }).eq('id', booking_id).execute()
         
         flash("Payment successful via Razorpay! Your booking is now fully paid.", "success")
-        return redirect(url_for('profile'))
+        return redirect(url_for('main.profile'))
         
     except Exception as e:
         flash(f"Payment Error: {str(e)}", "error")
-        return redirect(url_for('profile'))
+        return redirect(url_for('main.profile'))
 
-@app.route('/api/locations')
+@main.route('/api/locations')
+@rate_limit('locations', rate=2, burst=20, json=True)
 def get_locations():
     try:
         response = supabase.table('buildings').select('city, state, address').execute()
@@ -808,15 +928,16 @@ def get_locations():
     except Exception as e:
         return jsonify([])
 
-@app.route('/delete_room/<int:room_id>', methods=['POST'])
+@main.route('/delete_room/<int:room_id>', methods=['POST'])
 @login_required
 def delete_room(room_id):
     try:
         supabase.table('rooms').delete().eq('id', room_id).execute()
+        ranking.invalidate()
         flash("Room deleted", "info")
     except:
         flash("Error deleting", "error")
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""Measure how long it takes to import the app and build it with create_app().
+
+Each run happens in a fresh interpreter so module caches don't hide the cost.
+
+    python bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+SNIPPET = """
+import time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    here = os.path.dirname(os.path.abspath(__file__))
+    imports, factories = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", SNIPPET], cwd=here,
+                             capture_output=True, text=True, check=True).stdout
+        import_s, factory_s = (float(x) for x in out.split())
+        imports.append(import_s * 1000)
+        factories.append(factory_s * 1000)
+
+    for label, samples in (("import app", imports), ("create_app()", factories)):
+        print(f"{label:<14} median {statistics.median(samples):7.1f} ms   "
+              f"min {min(samples):7.1f} ms   max {max(samples):7.1f} ms")
+
+if __name__ == '__main__':
+    main()
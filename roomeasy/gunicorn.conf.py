@@ -0,0 +1,17 @@
+# gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+
+wsgi_app = "app:create_app()"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+# Clients connect here directly, so X-Forwarded-For isn't trusted. Behind a
+# reverse proxy, export TRUSTED_PROXY_HOPS=<number of proxies> for the app.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+# Build the app (and compile templates) once in the master; workers fork from it
+# and create their own Supabase client on first use.
+preload_app = True
+
+# Recycle workers regularly; cheap now that a fork does no setup work.
+max_requests = 1000
+max_requests_jitter = 100
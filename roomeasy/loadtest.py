@@ -0,0 +1,398 @@
+"""Scenario-driven load test against the app on the in-memory backend.
+
+Virtual users arrive at a Poisson rate, each logs in and walks through a
+scenario (home page, building and room pages, wishlist, booking, profile)
+with a random think time between steps. Every interval the runner prints
+throughput, latency percentiles, error rate and backend queries/sec.
+
+A step only counts as a success if it has the outcome a user expects: it
+lands on the right page (after following redirects, as a browser would),
+the page shows no flashed error, and the page or JSON body isn't empty.
+Routes that catch an exception and redirect home with a flash are errors
+even though every response was a 2xx or 3xx.
+
+By default the app runs in this process and virtual users drive it through
+Flask's test client. They share one interpreter and its GIL, and localdb
+serialises every query on one lock, so these numbers show how requests
+contend inside a single worker rather than what a deployment sustains:
+
+    python loadtest.py --duration 60 --arrival-rate 5 --think-time 0.5
+    python loadtest.py --scenario browse --max-users 200
+
+With --url, virtual users send real HTTP to a running server instead. Start
+one on the same seeded data (--users and --buildings must match) with
+
+    gunicorn -c gunicorn.conf.py 'loadtest:create_seeded_app()'
+    python loadtest.py --url http://127.0.0.1:8000
+
+Each gunicorn worker gets its own copy of the seeded data, so a wishlist or
+booking made through one worker isn't seen by the others; sessions are
+shared through the SQLite store. Backend queries/sec isn't reported.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+import app as roomeasy
+from localdb import LocalClient
+
+AMENITIES = ['Wifi', 'AC', 'TV', 'Parking', 'Laundry', 'Kitchen']
+CITIES = [('Pune', 'Maharashtra'), ('Mumbai', 'Maharashtra'), ('Bengaluru', 'Karnataka'),
+          ('Delhi', 'Delhi'), ('Jaipur', 'Rajasthan')]
+# How base.html renders a message flashed with the "error" category.
+FLASH_ERROR = b'flash-msg flash-error'
+
+
+def seed(client, users=200, buildings=50, rooms_per_building=6):
+    """Fill the local backend with verified users, buildings and rooms.
+
+    Seeding is deterministic, so two clients seeded with the same arguments
+    have the same building and room ids and the same owners.
+    """
+    rng = random.Random(42)
+    owners = []
+    for i in range(users):
+        row = client.table('user_profiles').insert({
+            "full_name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "password": "password",
+            "role": "user",
+            "is_verified": True,
+            "verification_status": "approved",
+            "profile_image_url": ""
+        }).execute().data[0]
+        owners.append(row['id'])
+
+    for b in range(buildings):
+        city, state = rng.choice(CITIES)
+        owner = rng.choice(owners)
+        building = client.table('buildings').insert({
+            "owner_id": owner,
+            "title": f"Building {b}",
+            "address": f"Sector {b}, {city}, {state}",
+            "state": state,
+            "city": city,
+            "nearby_location": f"Sector {b}",
+            "description": "",
+            "image_url": ""
+        }).execute().data[0]
+        for r in range(rooms_per_building):
+            client.table('rooms').insert({
+                "owner_id": owner,
+                "building_id": building['id'],
+                "title": f"Room {r}",
+                "address": building['address'],
+                "state": state,
+                "city": city,
+                "nearby_location": building['nearby_location'],
+                "price_per_month": rng.randrange(3000, 20000, 500),
+                "description": "",
+                "image_url": "",
+                "status": "available",
+                "amenities": rng.sample(AMENITIES, 3),
+                "more_images": []
+            }).execute()
+    return users
+
+
+def create_seeded_app(users=200, buildings=50, **config):
+    """An app on a freshly seeded in-memory backend, e.g. for gunicorn.
+
+    Rate limiting is off unless config turns it on, since every virtual user
+    comes from the same address.
+    """
+    db = LocalClient()
+    seed(db, users=users, buildings=buildings)
+    cfg = {'SUPABASE_CLIENT_FACTORY': lambda: db, 'RATE_LIMIT_ENABLED': False}
+    cfg.update(config)
+    return roomeasy.create_app(cfg)
+
+
+# --- Outcomes ---
+
+class Result:
+    def __init__(self, status, path, body):
+        self.status = status
+        self.path = path  # where the request ended up after redirects
+        self.body = body
+
+
+def lands_on(path):
+    """Expect a non-empty HTML page at `path` that shows no flashed error."""
+    def check(result):
+        if result.status != 200:
+            return f"status {result.status}"
+        if result.path != path:
+            return f"ended on {result.path}"
+        if FLASH_ERROR in result.body:
+            return "flashed an error"
+        if not result.body.strip():
+            return "empty page"
+        return None
+    return check
+
+
+def json_status(*statuses):
+    """Expect a JSON object whose "status" is one of `statuses`."""
+    def check(result):
+        if result.status != 200:
+            return f"status {result.status}"
+        try:
+            status = json.loads(result.body).get('status')
+        except (ValueError, AttributeError):
+            return "not a JSON object"
+        return None if status in statuses else f"JSON status {status!r}"
+    return check
+
+
+# --- Transports ---
+
+class TestClientTransport:
+    """Requests handled in this process by Flask's test client."""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data, follow_redirects=True)
+        return Result(response.status_code, response.request.path, response.get_data())
+
+
+class HTTPTransport:
+    """Real HTTP requests to a running server, with a cookie jar per virtual user."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data or {}).encode() if method == 'POST' else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return Result(response.status, urllib.parse.urlsplit(response.geturl()).path, response.read())
+        except urllib.error.HTTPError as e:
+            return Result(e.code, urllib.parse.urlsplit(e.geturl()).path, e.read())
+
+
+# A scenario builds the list of (step name, method, path, form data, expected
+# outcome) a virtual user runs in order.
+
+def _browse_steps(vu):
+    building_id = vu.pick('buildings')
+    room_id = vu.pick('rooms', building_id=building_id)
+    return [
+        ('index', 'GET', '/', None, lands_on('/')),
+        ('search', 'GET', '/?q=' + random.choice(CITIES)[0], None, lands_on('/')),
+        ('building_details', 'GET', f'/building/{building_id}', None, lands_on(f'/building/{building_id}')),
+        ('room_details', 'GET', f'/room/{room_id}', None, lands_on(f'/room/{room_id}')),
+    ]
+
+
+def _shopper_steps(vu):
+    room_id = vu.pick('rooms')
+    return _browse_steps(vu) + [
+        ('toggle_wishlist', 'POST', f'/toggle_wishlist/{room_id}', None, json_status('added', 'removed')),
+        ('wishlist', 'GET', '/wishlist', None, lands_on('/wishlist')),
+        ('profile', 'GET', '/profile', None, lands_on('/profile')),
+    ]
+
+
+def _booker_steps(vu):
+    # Owners can't book their own rooms; the app refuses with a flashed error.
+    room_id = vu.pick('rooms', others_only=True, status='available')
+    # Mostly visits, so the seeded rooms aren't all booked out early in the run.
+    booking_type = random.choices(['visit', 'lock', 'full'], weights=[8, 1, 1])[0]
+    return _shopper_steps(vu) + [
+        ('book_room', 'POST', f'/book/{room_id}', {'booking_type': booking_type, 'amount': '500'}, lands_on('/')),
+        ('profile', 'GET', '/profile', None, lands_on('/profile')),
+    ]
+
+
+SCENARIOS = {
+    'browse': _browse_steps,
+    'shopper': _shopper_steps,
+    'booker': _booker_steps,
+}
+DEFAULT_MIX = {'browse': 6, 'shopper': 3, 'booker': 1}
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []  # (finished_at, step, seconds, ok)
+        self.errors = Counter()  # (step, reason) -> count
+
+    def add(self, step, seconds, error=None):
+        with self.lock:
+            self.samples.append((time.monotonic(), step, seconds, error is None))
+            if error is not None:
+                self.errors[step, error] += 1
+
+    def since(self, start):
+        with self.lock:
+            return [s for s in self.samples if s[0] >= start]
+
+
+class VirtualUser:
+    def __init__(self, transport, db, stats, user_index, think_time):
+        self.transport = transport
+        self.db = db  # the seeded data, for picking ids to visit
+        self.stats = stats
+        self.email = f'user{user_index}@example.com'
+        with db.lock:
+            self.user_id = next((u['id'] for u in db.tables.get('user_profiles', [])
+                                 if u['email'] == self.email), None)
+        self.think_time = think_time
+
+    def pick(self, table, others_only=False, **where):
+        with self.db.lock:
+            rows = [r for r in self.db.tables.get(table, [])
+                    if all(r.get(k) == v for k, v in where.items())
+                    and not (others_only and r.get('owner_id') == self.user_id)]
+        return random.choice(rows)['id'] if rows else 0
+
+    def timed(self, step, method, path, data, expect):
+        t0 = time.perf_counter()
+        try:
+            error = expect(self.transport.request(method, path, data))
+        except Exception as e:
+            error = type(e).__name__
+        self.stats.add(step, time.perf_counter() - t0, error)
+
+    def run(self, scenario):
+        self.timed('login', 'POST', '/login', {'email': self.email, 'password': 'password'}, lands_on('/'))
+        for step in SCENARIOS[scenario](self):
+            if self.think_time:
+                time.sleep(random.expovariate(1 / self.think_time))
+            self.timed(*step)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _summarise(samples, seconds):
+    latencies = [s[2] * 1000 for s in samples]
+    errors = sum(1 for s in samples if not s[3])
+    return {
+        'requests': len(samples),
+        'rps': len(samples) / seconds if seconds else 0,
+        'p50': _percentile(latencies, 50),
+        'p95': _percentile(latencies, 95),
+        'p99': _percentile(latencies, 99),
+        'error_pct': 100 * errors / len(samples) if samples else 0,
+    }
+
+
+def run(duration=30, arrival_rate=5.0, think_time=0.5, max_users=100, interval=5,
+        scenario=None, users=200, buildings=50, rate_limit=False, url=None):
+    if url:
+        # The server seeds the same data; this copy is only used to pick ids.
+        db = LocalClient()
+        seed(db, users=users, buildings=buildings)
+        new_transport = lambda: HTTPTransport(url)
+    else:
+        flask_app = create_seeded_app(users, buildings, RATE_LIMIT_ENABLED=rate_limit, SESSION_STORE='memory')
+        db = roomeasy.get_supabase(flask_app)
+        new_transport = lambda: TestClientTransport(flask_app)
+    queries = lambda: None if url else db.query_count
+
+    stats = Stats()
+    slots = threading.Semaphore(max_users)
+    threads = []
+    mix = {scenario: 1} if scenario else DEFAULT_MIX
+    dropped = 0
+    active = [0]
+
+    def virtual_user():
+        with stats.lock:
+            active[0] += 1
+        try:
+            vu = VirtualUser(new_transport(), db, stats, random.randrange(users), think_time)
+            vu.run(random.choices(list(mix), weights=list(mix.values()))[0])
+        finally:
+            with stats.lock:
+                active[0] -= 1
+            slots.release()
+
+    print(f"{'t(s)':>5} {'active':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6} {'q/s':>8}")
+    start = time.monotonic()
+    next_arrival = start
+    next_report = start + interval
+    last_report, last_queries = start, queries()
+    while time.monotonic() - start < duration:
+        now = time.monotonic()
+        if now >= next_arrival:
+            if slots.acquire(blocking=False):
+                t = threading.Thread(target=virtual_user, daemon=True)
+                t.start()
+                threads.append(t)
+            else:
+                dropped += 1
+            next_arrival += random.expovariate(arrival_rate)
+        if now >= next_report:
+            window = _summarise(stats.since(last_report), now - last_report)
+            qps = '-' if url else f"{(queries() - last_queries) / (now - last_report):.1f}"
+            print(f"{now - start:5.0f} {active[0]:7d} {window['rps']:8.1f} {window['p50']:8.1f} "
+                  f"{window['p95']:8.1f} {window['p99']:8.1f} {window['error_pct']:6.1f} {qps:>8}")
+            last_report, last_queries = now, queries()
+            next_report += interval
+        time.sleep(max(0, min(next_arrival, next_report) - time.monotonic()))
+
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    total = _summarise(stats.samples, elapsed)
+    print(f"\n{total['requests']} requests in {elapsed:.1f}s: {total['rps']:.1f} req/s, "
+          f"p50 {total['p50']:.1f} ms, p95 {total['p95']:.1f} ms, p99 {total['p99']:.1f} ms, "
+          f"{total['error_pct']:.1f}% errors" + ("" if url else f", {queries() / elapsed:.1f} queries/s"))
+    if dropped:
+        print(f"{dropped} arrivals dropped at the {max_users}-user cap")
+
+    print(f"\n{'step':<18} {'count':>6} {'mean ms':>8} {'p95 ms':>8} {'err %':>6}")
+    for step in sorted({s[1] for s in stats.samples}):
+        samples = [s for s in stats.samples if s[1] == step]
+        summary = _summarise(samples, elapsed)
+        mean = statistics.mean(s[2] * 1000 for s in samples)
+        print(f"{step:<18} {summary['requests']:6d} {mean:8.1f} {summary['p95']:8.1f} {summary['error_pct']:6.1f}")
+
+    if stats.errors:
+        print("\nmost common errors:")
+        for (step, reason), count in stats.errors.most_common(10):
+            print(f"  {count:6d}  {step}: {reason}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=30, help="seconds to keep admitting users")
+    parser.add_argument('--arrival-rate', type=float, default=5.0, help="new virtual users per second")
+    parser.add_argument('--think-time', type=float, default=0.5, help="mean pause between steps, seconds")
+    parser.add_argument('--max-users', type=int, default=100, help="cap on concurrent virtual users")
+    parser.add_argument('--interval', type=float, default=5, help="seconds between progress lines")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), help="run only this scenario")
+    parser.add_argument('--users', type=int, default=200, help="seeded user accounts")
+    parser.add_argument('--buildings', type=int, default=50, help="seeded buildings")
+    parser.add_argument('--rate-limit', action='store_true', help="keep rate limiting on (in-process only)")
+    parser.add_argument('--url', help="send real HTTP to this server instead of running the app in-process")
+    args = parser.parse_args()
+    run(duration=args.duration, arrival_rate=args.arrival_rate, think_time=args.think_time,
+        max_users=args.max_users, interval=args.interval, scenario=args.scenario,
+        users=args.users, buildings=args.buildings, rate_limit=args.rate_limit, url=args.url)
+
+
+if __name__ == '__main__':
+    main()
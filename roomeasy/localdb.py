@@ -0,0 +1,233 @@
+"""In-memory stand-in for the Supabase client, for load tests and local runs.
+
+Supports the subset of the query builder that app.py uses:
+
+    client.table('rooms').select("*").eq('id', 1).order('created_at', desc=True).limit(1).execute()
+
+Plug it in with create_app({'SUPABASE_CLIENT_FACTORY': lambda: client}).
+"""
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+
+# Tables whose primary key is a uuid rather than an identity column.
+UUID_TABLES = {'user_profiles'}
+
+
+def _building_popularity(tables):
+    """Same rows as the building_popularity view in sql_query.txt."""
+    room_building = {r['id']: r.get('building_id') for r in tables.get('rooms', [])}
+    wishlists, bookings = {}, {}
+    for w in tables.get('wishlist', []):
+        b_id = room_building.get(w['room_id'])
+        wishlists[b_id] = wishlists.get(b_id, 0) + 1
+    for k in tables.get('bookings', []):
+        b_id = room_building.get(k['room_id'])
+        bookings[b_id] = bookings.get(b_id, 0) + 1
+    return [dict(b, wishlist_count=wishlists.get(b['id'], 0), booking_count=bookings.get(b['id'], 0))
+            for b in tables.get('buildings', [])]
+
+
+# Read-only views, computed from the tables on each query.
+VIEWS = {'building_popularity': _building_popularity}
+
+
+def _rooms_availability(tables, changed):
+    """Same effect as the rooms_availability trigger in sql_query.txt."""
+    for building_id in {str(r.get('building_id')) for r in changed if r.get('building_id') is not None}:
+        all_rooms = [r for r in tables.get('rooms', []) if str(r.get('building_id')) == building_id]
+        rooms = [r for r in all_rooms if r.get('status') == 'available']
+        prices = [float(r['price_per_month']) for r in rooms if r.get('price_per_month') is not None]
+        summary = {
+            "total_rooms": len(all_rooms),
+            "available_rooms": len(rooms),
+            "min_price": min(prices) if prices else None,
+            "max_price": max(prices) if prices else None,
+            "amenities": sorted({a for r in rooms for a in (r.get('amenities') or [])}),
+        }
+        for b in tables.get('buildings', []):
+            if str(b['id']) == building_id:
+                b.update(summary)
+
+
+# Run after each insert, update or delete on a table, with the old and new
+# versions of the changed rows.
+TRIGGERS = {'rooms': _rooms_availability}
+
+
+class Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class QueryError(Exception):
+    pass
+
+
+def _ilike(pattern):
+    parts = [re.escape(p) for p in pattern.split('%')]
+    return re.compile('^' + '.*'.join(parts) + '$', re.IGNORECASE | re.DOTALL)
+
+
+class Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = 'select'
+        self.columns = '*'
+        self.count = None
+        self.payload = None
+        self.filters = []
+        self.or_filters = None
+        self.order_by = []
+        self.limit_n = None
+        self.offset = 0
+        self.single_row = False
+
+    # --- operations ---
+
+    def select(self, columns="*", count=None):
+        self.op, self.columns, self.count = 'select', columns, count
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = 'insert', payload
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = 'update', payload
+        return self
+
+    def delete(self):
+        self.op = 'delete'
+        return self
+
+    # --- filters and modifiers ---
+
+    def eq(self, column, value):
+        self.filters.append(('eq', column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(('in', column, list(values)))
+        return self
+
+    def or_(self, filters):
+        # "address.ilike.%pune%,city.ilike.%pune%" -> [(column, op, value), ...]
+        self.or_filters = [tuple(f.split('.', 2)) for f in filters.split(',')]
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit_n = start, end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    # --- execution ---
+
+    def _matches(self, row):
+        for op, column, value in self.filters:
+            if op == 'eq' and str(row.get(column)) != str(value):
+                return False
+            if op == 'in' and str(row.get(column)) not in {str(v) for v in value}:
+                return False
+        if self.or_filters:
+            for column, op, value in self.or_filters:
+                cell = row.get(column)
+                if op == 'ilike' and cell is not None and _ilike(value).match(str(cell)):
+                    break
+                if op == 'eq' and str(cell) == value:
+                    break
+            else:
+                return False
+        return True
+
+    def _project(self, row):
+        if self.columns.strip() == '*':
+            return dict(row)
+        return {c.strip(): row.get(c.strip()) for c in self.columns.split(',')}
+
+    def execute(self):
+        with self.client.lock:
+            if self.table in VIEWS:
+                rows = VIEWS[self.table](self.client.tables)
+            else:
+                rows = self.client.tables.setdefault(self.table, [])
+            previous = []  # rows as they were before an update
+            if self.op == 'insert':
+                items = self.payload if isinstance(self.payload, list) else [self.payload]
+                data = [dict(self.client.new_row(self.table, item)) for item in items]
+            elif self.op == 'update':
+                data = []
+                for row in rows:
+                    if self._matches(row):
+                        previous.append(dict(row))
+                        row.update(self.payload)
+                        data.append(dict(row))
+            elif self.op == 'delete':
+                data = [dict(r) for r in rows if self._matches(r)]
+                rows[:] = [r for r in rows if not self._matches(r)]
+            else:
+                matched = [r for r in rows if self._matches(r)]
+                # Stable sorts applied last-key-first; NULLs sort as the largest value,
+                # as in Postgres.
+                for column, desc in reversed(self.order_by):
+                    matched.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else 0),
+                                 reverse=desc)
+                total = len(matched)
+                matched = matched[self.offset:]
+                if self.limit_n is not None:
+                    matched = matched[:self.limit_n]
+                data = [self._project(r) for r in matched]
+            if self.op != 'select' and self.table in TRIGGERS:
+                TRIGGERS[self.table](self.client.tables, data + previous)
+        self.client.record(self, data)
+
+        if self.single_row:
+            if len(data) != 1:
+                raise QueryError(f"Expected a single row from {self.table}, got {len(data)}")
+            return Response(data[0])
+        return Response(data, total if self.op == 'select' and self.count else None)
+
+
+class LocalClient:
+    def __init__(self):
+        self.tables = {}
+        self.lock = threading.RLock()
+        self.query_count = 0
+        self.listeners = []
+        self._next_id = {}
+
+    def table(self, name):
+        return Query(self, name)
+
+    def new_row(self, table, item):
+        row = dict(item)
+        if 'id' not in row:
+            if table in UUID_TABLES:
+                row['id'] = str(uuid.uuid4())
+            else:
+                self._next_id[table] = self._next_id.get(table, 0) + 1
+                row['id'] = self._next_id[table]
+        row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+        self.tables.setdefault(table, []).append(row)
+        return row
+
+    def record(self, query, data):
+        """Count the query and hand it to any listeners (e.g. a query auditor)."""
+        with self.lock:
+            self.query_count += 1
+        for listener in self.listeners:
+            listener(query, data)
@@ -0,0 +1,274 @@
+"""Development-mode audit of the queries each route makes.
+
+With create_app({'QUERY_AUDIT': True}) and the in-memory backend, every
+request's query sequence is recorded and checked for:
+
+  unbounded     select with no limit(), single() or id/id-list filter
+  repeated      the same query run more than once in one request
+  n_plus_one    the same query shape run once per row (only filter values differ)
+  over_fetch    select("*") where most returned columns are never read
+
+and against a per-route budget of queries and rows (QUERY_BUDGETS).
+Running this module crawls every page on seeded data, prints the report,
+and exits non-zero when a route is over budget (or, with --strict, when
+it has any finding):
+
+    python query_audit.py [--strict] [--max-queries 10] [--max-rows 500]
+"""
+import argparse
+import sys
+import threading
+
+from flask import g, has_request_context, request
+
+DEFAULT_BUDGET = {'queries': 10, 'rows': 500}
+# Same-shape queries in one request before it counts as a per-row loop.
+N_PLUS_ONE_THRESHOLD = 3
+# Unread columns in a select("*") before it counts as over-fetching.
+OVER_FETCH_MIN_UNUSED = 3
+
+
+class TrackedRow(dict):
+    """A result row that remembers which columns were read."""
+
+    def __init__(self, row, record):
+        super().__init__(row)
+        self._record = record
+
+    def __getitem__(self, key):
+        self._record['read'].add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._record['read'].add(key)
+        return super().get(key, default)
+
+
+def _describe(query, data):
+    return {
+        'table': query.table,
+        'op': query.op,
+        'columns': query.columns,
+        'filters': tuple((op, col, str(val)) for op, col, val in query.filters),
+        'or': tuple(query.or_filters or ()),
+        'order': tuple(query.order_by),
+        'limit': query.limit_n,
+        'offset': query.offset,
+        'single': query.single_row,
+        'rows': len(data),
+        'fetched': set().union(*(row.keys() for row in data)) if data else set(),
+        'read': set(),
+    }
+
+
+def _signature(q):
+    return (q['table'], q['op'], q['columns'], q['filters'], q['or'], q['order'], q['limit'], q['offset'],
+            q['single'])
+
+
+def _shape(q):
+    filters = tuple((op, col) for op, col, _ in q['filters'])
+    return (q['table'], q['op'], q['columns'], filters, q['or'], q['order'], q['limit'], q['offset'], q['single'])
+
+
+def _label(q):
+    filters = ''.join(f".{op}({col})" for op, col, _ in q['filters'])
+    if q['or']:
+        filters += '.or_(' + ','.join(col for col, _, _ in q['or']) + ')'
+    modifiers = ''.join(f".order({col}{', desc' if desc else ''})" for col, desc in q['order'])
+    if q['offset']:
+        end = f"{q['offset'] + q['limit'] - 1}" if q['limit'] is not None else ''
+        modifiers += f".range({q['offset']}, {end})"
+    elif q['limit'] is not None:
+        modifiers += f".limit({q['limit']})"
+    if q['single']:
+        modifiers += ".single()"
+    return f"{q['table']}.{q['op']}({q['columns']!r}){filters}{modifiers}"
+
+
+def analyse(queries):
+    """Return (rule, message) findings for one request's query sequence."""
+    findings = []
+    seen_signatures, shapes = {}, {}
+    for q in queries:
+        seen_signatures[_signature(q)] = seen_signatures.get(_signature(q), 0) + 1
+        shapes.setdefault(_shape(q), set()).add(q['filters'])
+
+        # Lookups by id, or by a list of ids, are bounded by the filter itself.
+        if q['op'] == 'select' and q['limit'] is None and not q['single'] \
+                and not any(op in ('eq', 'in') and col == 'id' for op, col, _ in q['filters']):
+            findings.append(('unbounded', f"{_label(q)} has no limit ({q['rows']} rows)"))
+
+        if q['op'] == 'select' and q['columns'].strip() == '*' and q['rows']:
+            unused = q['fetched'] - q['read']
+            if q['read'] and len(unused) >= OVER_FETCH_MIN_UNUSED:
+                findings.append(('over_fetch', f"{_label(q)} reads only {sorted(q['read'])}; "
+                                               f"{len(unused)} columns unused"))
+
+    for q in {_signature(q): q for q in queries}.values():
+        if seen_signatures[_signature(q)] > 1:
+            findings.append(('repeated', f"{_label(q)} ran {seen_signatures[_signature(q)]} times"))
+    for shape, variants in shapes.items():
+        if len(variants) >= N_PLUS_ONE_THRESHOLD:
+            q = next(q for q in queries if _shape(q) == shape)
+            findings.append(('n_plus_one', f"{_label(q)} ran {len(variants)} times with different values"))
+    # A query repeated in a loop would otherwise report the same problem each time.
+    return list(dict.fromkeys(findings))
+
+
+class QueryAuditor:
+    def __init__(self, budgets=None):
+        self.budgets = budgets or {}
+        self.routes = {}  # endpoint -> list of per-request reports
+        self._lock = threading.Lock()
+
+    def budget_for(self, endpoint):
+        budget = dict(DEFAULT_BUDGET)
+        budget.update(self.budgets.get('default', {}))
+        budget.update(self.budgets.get(endpoint, {}))
+        return budget
+
+    def init_app(self, app, client):
+        """Record queries made by `client` (a localdb.LocalClient) during requests."""
+        client.listeners.append(self._on_query)
+        app.before_request(self._start)
+        app.teardown_request(self._finish)
+
+    def _start(self):
+        g.audit_queries = []
+
+    def _on_query(self, query, data):
+        if not has_request_context() or 'audit_queries' not in g:
+            return
+        record = _describe(query, data)
+        # Wrap rows in place so reads by the route and templates are tracked.
+        for i, row in enumerate(data):
+            data[i] = TrackedRow(row, record)
+        g.audit_queries.append(record)
+
+    def _finish(self, exc=None):
+        queries = g.pop('audit_queries', None)
+        if queries is None or request.endpoint is None:
+            return
+        # Budgets are keyed by view name, without the blueprint prefix.
+        endpoint = request.endpoint.rpartition('.')[2]
+        budget = self.budget_for(endpoint)
+        rows = sum(q['rows'] for q in queries)
+        findings = analyse(queries)
+        if len(queries) > budget['queries']:
+            findings.append(('budget', f"{len(queries)} queries (budget {budget['queries']})"))
+        if rows > budget['rows']:
+            findings.append(('budget', f"{rows} rows (budget {budget['rows']})"))
+        report = {
+            'path': request.full_path.rstrip('?'),
+            'queries': [_label(q) for q in queries],
+            'rows': rows,
+            'findings': findings,
+        }
+        with self._lock:
+            self.routes.setdefault(endpoint, []).append(report)
+
+    def failures(self, strict=False):
+        """(endpoint, path, rule, message) for budget violations, plus every finding if strict."""
+        out = []
+        with self._lock:
+            for endpoint, reports in self.routes.items():
+                for report in reports:
+                    for rule, message in report['findings']:
+                        if strict or rule == 'budget':
+                            out.append((endpoint, report['path'], rule, message))
+        return out
+
+    def report(self, out=sys.stdout):
+        with self._lock:
+            routes = dict(self.routes)
+        for endpoint in sorted(routes):
+            for report in routes[endpoint]:
+                print(f"\n{endpoint}  {report['path']}  "
+                      f"({len(report['queries'])} queries, {report['rows']} rows)", file=out)
+                for i, label in enumerate(report['queries'], 1):
+                    print(f"  {i:2d}. {label}", file=out)
+                for rule, message in report['findings']:
+                    print(f"  [{rule}] {message}", file=out)
+
+
+def crawl(max_queries=None, max_rows=None, budgets=None):
+    """Seed the in-memory backend, visit every page as each kind of user, return the auditor."""
+    import app as roomeasy
+    from loadtest import seed
+    from localdb import LocalClient
+
+    budgets = dict(budgets or {})
+    default = dict(budgets.get('default', {}))
+    if max_queries is not None:
+        default['queries'] = max_queries
+    if max_rows is not None:
+        default['rows'] = max_rows
+    budgets['default'] = default
+
+    db = LocalClient()
+    flask_app = roomeasy.create_app({
+        'SUPABASE_CLIENT_FACTORY': lambda: db,
+        'RATE_LIMIT_ENABLED': False,
+        'SESSION_STORE': 'memory',
+        'QUERY_AUDIT': True,
+        'QUERY_BUDGETS': budgets,
+    })
+    with flask_app.app_context():
+        seed(db, users=20, buildings=10)
+    users = db.tables['user_profiles']
+    users[0]['role'] = 'admin'
+    owner = db.tables['buildings'][0]['owner_id']
+    renter = next(u for u in users if u['id'] != owner)
+    owned_rooms = [r for r in db.tables['rooms'] if r['owner_id'] == owner]
+    for room in owned_rooms[:4]:
+        room['status'] = 'booked'
+        db.table('bookings').insert({'user_id': renter['id'], 'room_id': room['id'],
+                                     'booking_type': 'full', 'amount_paid': room['price_per_month']}).execute()
+        db.table('wishlist').insert({'user_id': renter['id'], 'room_id': room['id']}).execute()
+
+    auditor = flask_app.extensions['query_audit']
+    building_id = db.tables['buildings'][0]['id']
+    room_id = owned_rooms[-1]['id']
+    public = ['/', '/?q=Pune', f'/building/{building_id}', f'/room/{room_id}', '/api/locations', '/login', '/signup']
+    member = ['/', '/profile', '/wishlist', '/verification-pending']
+    admin = ['/admin', '/admin/users', '/admin/verifications']
+
+    def visit(email, paths):
+        client = flask_app.test_client()
+        if email:
+            client.post('/login', data={'email': email, 'password': 'password'})
+        for path in paths:
+            client.get(path)
+        return client
+
+    visit(None, public)
+    visit(next(u['email'] for u in users if u['id'] == owner), member)
+    renter_client = visit(renter['email'], member)
+    renter_client.post(f'/toggle_wishlist/{room_id}')
+    visit(users[0]['email'], admin)
+    return auditor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--strict', action='store_true', help="fail on any finding, not just budgets")
+    parser.add_argument('--max-queries', type=int, help="default per-request query budget")
+    parser.add_argument('--max-rows', type=int, help="default per-request row budget")
+    parser.add_argument('--quiet', action='store_true', help="only print failures")
+    args = parser.parse_args()
+
+    auditor = crawl(max_queries=args.max_queries, max_rows=args.max_rows)
+    if not args.quiet:
+        auditor.report()
+    failures = auditor.failures(strict=args.strict)
+    if failures:
+        print(f"\n{len(failures)} failure(s):")
+        for endpoint, path, rule, message in failures:
+            print(f"  {endpoint} {path} [{rule}] {message}")
+        sys.exit(1)
+    print("\nQuery audit passed.")
+
+
+if __name__ == '__main__':
+    main()
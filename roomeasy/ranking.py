@@ -0,0 +1,201 @@
+"""Featured / recommended building ranking for the home page.
+
+Scores are computed in bulk from wishlist counts, bookings, room availability
+and recency, then kept as per-city candidate pools that a background thread
+rebuilds every `ttl` seconds. Serving a page only draws k buildings from a
+cached pool.
+"""
+import bisect
+import math
+import os
+import random
+import threading
+from datetime import datetime, timezone
+
+WISHLIST_WEIGHT = 1.0
+BOOKING_WEIGHT = 1.5
+AVAILABILITY_WEIGHT = 2.0
+RECENCY_WEIGHT = 1.0
+RECENCY_HALF_LIFE_DAYS = 30
+# Every building gets some weight so new or quiet listings still rotate in.
+BASE_SCORE = 0.5
+
+
+def _age_days(created_at, now):
+    if not created_at:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return max((now - ts).total_seconds() / 86400, 0)
+
+
+def score_building(wishlists, bookings, available_rooms, age_days):
+    score = BASE_SCORE
+    score += WISHLIST_WEIGHT * math.log1p(wishlists)
+    score += BOOKING_WEIGHT * math.log1p(bookings)
+    # A building with nothing to rent should not be pushed to the front.
+    score += AVAILABILITY_WEIGHT * min(available_rooms, 5) / 5
+    if age_days is not None:
+        score += RECENCY_WEIGHT * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    return score
+
+
+class _Pool:
+    """Buildings with precomputed cumulative weights for quick weighted draws."""
+
+    def __init__(self, scored):
+        self.buildings = [b for b, _ in scored]
+        self.cum_weights = []
+        total = 0
+        for _, s in scored:
+            total += s
+            self.cum_weights.append(total)
+
+    def draw(self, k, exclude):
+        """Weighted sample without replacement of up to k buildings not in exclude."""
+        available = [b for b in self.buildings if b['id'] not in exclude]
+        if len(available) <= k:
+            random.shuffle(available)
+            return available
+
+        picked, seen = [], set(exclude)
+        total = self.cum_weights[-1]
+        # Rejection sampling: expected O(k log n) while k is small next to the pool.
+        attempts = 0
+        while len(picked) < k and attempts < k * 20:
+            attempts += 1
+            i = bisect.bisect_left(self.cum_weights, random.random() * total)
+            b = self.buildings[min(i, len(self.buildings) - 1)]
+            if b['id'] not in seen:
+                seen.add(b['id'])
+                picked.append(b)
+        if len(picked) < k:
+            rest = [b for b in available if b['id'] not in seen]
+            picked.extend(random.sample(rest, min(k - len(picked), len(rest))))
+        return picked
+
+
+class RankingEngine:
+    """Per-process pools, rebuilt by a background thread every `ttl` seconds.
+
+    Scores come from the building_popularity view (sql_query.txt), which
+    aggregates wishlist and booking counts per building in the database.
+    """
+
+    # Supabase caps each response (1000 rows by default), so read in pages.
+    PAGE_SIZE = 1000
+    # After a failed refresh, retry after this many seconds, doubling on each
+    # further failure up to ttl.
+    RETRY_DELAY = 5
+
+    def __init__(self, get_client, ttl=300, pool_size=50):
+        self.get_client = get_client
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self._loaded = False
+        self._failures = 0
+        self._global = _Pool([])
+        self._cities = {}
+
+    def invalidate(self):
+        """Ask the background thread to rebuild the pools now."""
+        self._wake.set()
+
+    def _fetch(self):
+        client = self.get_client()
+        rows, offset = [], 0
+        while True:
+            page = client.table('building_popularity').select("*").order('id') \
+                .range(offset, offset + self.PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return rows
+            offset += self.PAGE_SIZE
+
+    def refresh(self):
+        now = datetime.now(timezone.utc)
+        scored = []
+        for b in self._fetch():
+            # Keep plain copies: the pools outlive the request that fetched the
+            # rows, and a dev-mode query auditor may have wrapped them.
+            b = dict(b)
+            s = score_building(b.get('wishlist_count') or 0,
+                               b.get('booking_count') or 0,
+                               b.get('available_rooms') or 0,
+                               _age_days(b.get('created_at'), now))
+            scored.append((b, s))
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+
+        by_city = {}
+        for b, s in scored:
+            city = (b.get('city') or '').strip().lower()
+            if city:
+                by_city.setdefault(city, []).append((b, s))
+
+        self._global = _Pool(scored[:self.pool_size])
+        self._cities = {city: _Pool(items[:self.pool_size]) for city, items in by_city.items()}
+        self._loaded = True
+
+    def _try_refresh(self):
+        try:
+            self.refresh()
+            self._failures = 0
+        except Exception as e:
+            self._failures += 1
+            print(f"Error refreshing ranking pools: {e}")
+
+    def _run(self):
+        while True:
+            delay = self.ttl
+            if self._failures:
+                delay = min(self.ttl, self.RETRY_DELAY * 2 ** (self._failures - 1))
+            self._wake.wait(delay)
+            self._wake.clear()
+            self._try_refresh()
+
+    def _ensure_started(self):
+        # Threads don't survive fork, so each gunicorn worker starts its own
+        # refresher on first use. The first load happens inline so the very
+        # first page isn't empty; if it fails, pages go without featured
+        # buildings until the background thread's retries succeed.
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                if not self._loaded:
+                    self._try_refresh()
+                self._thread = threading.Thread(target=self._run, name='ranking-refresh', daemon=True)
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def _city_pool(self, location):
+        location = (location or '').strip().lower()
+        if not location:
+            return None
+        if location in self._cities:
+            return self._cities[location]
+        for city, pool in self._cities.items():
+            if city in location or location in city:
+                return pool
+        return None
+
+    def pick(self, k, location=None, exclude=()):
+        """Draw k buildings, preferring the pool for the user's searched city."""
+        self._ensure_started()
+        exclude = set(exclude)
+        picked = []
+        city_pool = self._city_pool(location)
+        if city_pool:
+            picked = city_pool.draw(k, exclude)
+            exclude.update(b['id'] for b in picked)
+        if len(picked) < k:
+            picked.extend(self._global.draw(k - len(picked), exclude))
+        return picked
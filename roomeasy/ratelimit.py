@@ -0,0 +1,163 @@
+"""Token-bucket rate limiting for the public endpoints.
+
+Each route gets a budget of `rate` requests per second with bursts up to
+`burst`. Buckets are kept per client IP and, for logged-in users, per user id.
+MemoryBackend is per process; RedisBackend shares buckets between workers and
+hosts (needs the `redis` package).
+"""
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+
+
+class MemoryBackend:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Take one token. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+        if allowed:
+            return True, 0
+        return False, (1 - tokens) / rate
+
+    def _evict(self, now):
+        # Buckets idle long enough to be full again carry no state worth keeping.
+        # Fall back to dropping the oldest half if everything is recent.
+        stale = [k for k, (_, last) in self._buckets.items() if now - last > 3600]
+        if not stale:
+            by_age = sorted(self._buckets.items(), key=lambda item: item[1][1])
+            stale = [k for k, _ in by_age[:len(by_age) // 2]]
+        for k in stale:
+            del self._buckets[k]
+
+
+class BackendUnavailable(Exception):
+    """The shared backend couldn't be reached; the limiter lets the request through."""
+
+
+class RedisBackend:
+    _SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix="rl:"):
+        import redis
+
+        self._errors = redis.RedisError
+        self.client = redis.Redis.from_url(url, socket_timeout=0.1, socket_connect_timeout=0.1)
+        self.prefix = prefix
+        self._take = self.client.register_script(self._SCRIPT)
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        try:
+            allowed, tokens = self._take(keys=[self.prefix + key], args=[rate, burst, now])
+        except self._errors as e:
+            raise BackendUnavailable(str(e)) from e
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / rate
+
+
+# Default budgets, filled in by @rate_limit as the routes are defined.
+DEFAULT_BUDGETS = {}
+
+
+class RateLimiter:
+    def __init__(self, backend=None, budgets=None):
+        self.backend = backend or MemoryBackend()
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, outcome):
+        with self._stats_lock:
+            counts = self._stats.setdefault(name, {'allowed': 0, 'limited': 0, 'backend_errors': 0})
+            counts[outcome] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {name: dict(counts) for name, counts in self._stats.items()}
+
+    def check(self, name, rate, burst):
+        """Returns the seconds to wait, or 0 if the request may go ahead."""
+        keys = [f"{name}:ip:{request.remote_addr}"]
+        if 'user' in session:
+            keys.append(f"{name}:user:{session['user']}")
+        for key in keys:
+            try:
+                allowed, retry_after = self.backend.take(key, rate, burst)
+            except BackendUnavailable as e:
+                # Fail open: an outage of the shared store shouldn't take the site down.
+                print(f"Rate limit backend unavailable: {e}")
+                self._count(name, 'backend_errors')
+                return 0
+            if not allowed:
+                # Stop here so a refused request doesn't also spend the user's tokens.
+                self._count(name, 'limited')
+                return retry_after
+        self._count(name, 'allowed')
+        return 0
+
+
+def rate_limit(name, rate, burst, when=None, json=False):
+    """Decorator applying a per-route budget; `when` restricts which requests count.
+
+    The limiter itself is the one create_app() stores in app.extensions['limiter'].
+    """
+    DEFAULT_BUDGETS[name] = (rate, burst)
+
+    def decorator(f):
+        @wraps(f)
+        def wrap(*args, **kwargs):
+            limiter = current_app.extensions.get('limiter')
+            if limiter is None or not current_app.config.get('RATE_LIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+            if when is not None and not when():
+                return f(*args, **kwargs)
+            route_rate, route_burst = limiter.budgets.get(name, DEFAULT_BUDGETS[name])
+            wait = limiter.check(name, route_rate, route_burst)
+            if wait:
+                return _too_many_requests(wait, json)
+            return f(*args, **kwargs)
+        return wrap
+    return decorator
+
+
+def _too_many_requests(wait, json):
+    retry_after = str(max(1, math.ceil(wait)))
+    if json:
+        response = jsonify({'status': 'error', 'message': 'Too many requests'})
+    else:
+        response = current_app.response_class("Too many requests. Please slow down.", mimetype='text/plain')
+    response.status_code = 429
+    response.headers['Retry-After'] = retry_after
+    return response
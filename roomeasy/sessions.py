@@ -0,0 +1,220 @@
+"""Server-side sessions: the cookie carries only a random session id.
+
+Session data (login details, flashed messages, last search) is serialised
+with Flask's tagged JSON, the format its cookie sessions use, and kept in a
+SessionStore. MemoryStore is per process and suits a single worker or the
+load test. SQLiteStore is shared by all workers on one host. Each store indexes sessions by user id, so a user can
+be signed out everywhere with delete_user().
+
+A session expires once it has been idle for PERMANENT_SESSION_LIFETIME:
+saving it, or reading it more than TOUCH_INTERVAL after its expiry was last
+set, pushes the expiry forward.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+# Compact JSON that round-trips Markup, datetimes and tuples, and unlike
+# marshal stays readable after a Python upgrade.
+_serializer = TaggedJSONSerializer()
+
+
+def dumps(data):
+    return _serializer.dumps(data).encode()
+
+
+def loads(blob):
+    return _serializer.loads(blob)
+
+
+class MemoryStore:
+    def __init__(self, max_sessions=50000):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # sid -> (expires, user_id, blob)
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        """(blob, expires) for a live session, else None."""
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._remove(sid)
+                return None
+            self._sessions.move_to_end(sid)
+            return entry[2], entry[0]
+
+    def touch(self, sid, expires):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is not None:
+                self._sessions[sid] = (expires, entry[1], entry[2])
+
+    def save(self, sid, user_id, blob, expires):
+        with self._lock:
+            self._remove(sid)
+            self._sessions[sid] = (expires, user_id, blob)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(sid)
+            # Least recently used sessions go first once the store is full.
+            while len(self._sessions) > self.max_sessions:
+                self._remove(next(iter(self._sessions)))
+
+    def delete(self, sid):
+        with self._lock:
+            self._remove(sid)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for sid in list(self._by_user.get(str(user_id), ())):
+                self._remove(sid)
+
+    def _remove(self, sid):
+        entry = self._sessions.pop(sid, None)
+        if entry and entry[1] is not None:
+            sids = self._by_user.get(entry[1])
+            if sids:
+                sids.discard(sid)
+                if not sids:
+                    del self._by_user[entry[1]]
+
+
+class SQLiteStore:
+    # Expired rows are purged on every Nth write rather than on each request.
+    PURGE_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        # A throwaway connection, so none is left open for forked workers
+        # (gunicorn preload_app) to inherit.
+        conn = sqlite3.connect(path, timeout=5)
+        try:
+            with conn:
+                conn.execute("""
+                    create table if not exists sessions (
+                      sid text primary key,
+                      user_id text,
+                      data blob not null,
+                      expires real not null
+                    )""")
+                conn.execute("create index if not exists sessions_user_id on sessions (user_id)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # One connection per thread and per process; sqlite connections can't
+        # be shared across either.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("pragma synchronous=normal")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def load(self, sid):
+        """(blob, expires) for a live session, else None."""
+        row = self._connect().execute(
+            "select data, expires from sessions where sid = ? and expires >= ?", (sid, time.time())).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def touch(self, sid, expires):
+        with self._connect() as conn:
+            conn.execute("update sessions set expires = ? where sid = ?", (expires, sid))
+
+    def save(self, sid, user_id, blob, expires):
+        with self._connect() as conn:
+            conn.execute("insert or replace into sessions (sid, user_id, data, expires) values (?, ?, ?, ?)",
+                         (sid, user_id, blob, expires))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("delete from sessions where expires < ?", (time.time(),))
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute("delete from sessions where sid = ?", (sid,))
+
+    def delete_user(self, user_id):
+        with self._connect() as conn:
+            conn.execute("delete from sessions where user_id = ?", (str(user_id),))
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        # Remembered so a login can be given a fresh session id.
+        self.loaded_user = self.get('user')
+
+
+class ServerSideSessionInterface(SessionInterface):
+    # Seconds between expiry refreshes for a session that is read but not
+    # changed, so busy sessions don't write to the store on every request.
+    TOUCH_INTERVAL = 3600
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.load(sid)
+            if entry is not None:
+                blob, expires = entry
+                try:
+                    session = ServerSideSession(loads(blob), sid)
+                except (ValueError, TypeError):
+                    return ServerSideSession()
+                renewed = time.time() + app.permanent_session_lifetime.total_seconds()
+                if renewed - expires > self.TOUCH_INTERVAL:
+                    self.store.touch(sid, renewed)
+                return session
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+
+        response.vary.add('Cookie')
+        if session.sid is None or session.get('user') != session.loaded_user:
+            # New session, or someone logged in/out: issue a new id so an id
+            # planted before login can't be reused afterwards.
+            if session.sid:
+                self.store.delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+            session.loaded_user = session.get('user')
+
+        user_id = session.get('user')
+        expires = time.time() + app.permanent_session_lifetime.total_seconds()
+        self.store.save(session.sid, str(user_id) if user_id is not None else None, dumps(dict(session)), expires)
+        response.set_cookie(name, session.sid,
+                            expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from localdb import LocalClient  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    return LocalClient()
+
+
+@pytest.fixture
+def make_app(db):
+    """Build an app on the in-memory backend; extra config overrides the defaults."""
+    def make(**config):
+        cfg = {
+            'TESTING': True,
+            'SUPABASE_CLIENT_FACTORY': lambda: db,
+            'SESSION_STORE': 'memory',
+        }
+        cfg.update(config)
+        return create_app(cfg)
+    return make
@@ -0,0 +1,29 @@
+from app import create_app
+from localdb import LocalClient
+
+
+def test_create_app_twice_gives_independent_apps():
+    db1, db2 = LocalClient(), LocalClient()
+    db1.table('buildings').insert({'title': 'Only In Db One', 'address': 'A, Pune, MH', 'city': 'Pune',
+                                   'state': 'MH', 'image_url': ''}).execute()
+
+    cfg = {'TESTING': True, 'SESSION_STORE': 'memory', 'QUERY_AUDIT': True}
+    app1 = create_app(dict(cfg, SUPABASE_CLIENT_FACTORY=lambda: db1, RATE_LIMIT_ENABLED=False))
+    assert app1.test_client().get('/').status_code == 200
+
+    # A second call after a request must not touch the first app.
+    app2 = create_app(dict(cfg, SUPABASE_CLIENT_FACTORY=lambda: db2))
+    assert app2 is not app1
+    assert 'RATE_LIMIT_ENABLED' not in app2.config
+    assert app2.test_client().get('/').status_code == 200
+
+    assert b'Only In Db One' in app1.test_client().get('/').data
+    assert b'Only In Db One' not in app2.test_client().get('/').data
+    assert app1.extensions['query_audit'] is not app2.extensions['query_audit']
+
+
+def test_routes_use_blueprint_endpoints(make_app):
+    app = make_app()
+    response = app.test_client().get('/profile')
+    assert response.status_code == 302
+    assert response.location.endswith('/login')
@@ -0,0 +1,54 @@
+def _building(db, title='Tower'):
+    # available_rooms starts at 0, like the column's DEFAULT 0.
+    return db.table('buildings').insert({'title': title, 'city': 'Pune', 'address': '1, Pune', 'image_url': '',
+                                         'available_rooms': 0}).execute().data[0]
+
+
+def _room(db, building_id, price, amenities, status='available'):
+    return db.table('rooms').insert({'building_id': building_id, 'title': f'Room {price}',
+                                     'price_per_month': price, 'amenities': amenities,
+                                     'status': status, 'image_url': ''}).execute().data[0]
+
+
+def _summary(db, building_id):
+    b = db.table('buildings').select("total_rooms, available_rooms, min_price, max_price, amenities") \
+        .eq('id', building_id).single().execute().data
+    return b['total_rooms'], b['available_rooms'], b['min_price'], b['max_price'], b['amenities']
+
+
+def test_summary_follows_room_changes(db):
+    building = _building(db)
+    cheap = _room(db, building['id'], 5000, ['Wifi'])
+    _room(db, building['id'], 9000, ['AC', 'Wifi'])
+    _room(db, building['id'], 1000, ['TV'], status='booked')
+    assert _summary(db, building['id']) == (3, 2, 5000, 9000, ['AC', 'Wifi'])
+
+    db.table('rooms').update({'status': 'booked'}).eq('id', cheap['id']).execute()
+    assert _summary(db, building['id']) == (3, 1, 9000, 9000, ['AC', 'Wifi'])
+
+    db.table('rooms').delete().eq('building_id', building['id']).execute()
+    assert _summary(db, building['id']) == (0, 0, None, None, [])
+
+
+def test_building_details_lists_rooms_despite_stale_counter(db, make_app):
+    building = _building(db)
+    _room(db, building['id'], 5000, ['Wifi'])
+    # A summary written before the trigger existed must not hide rooms.
+    db.tables['buildings'][0]['available_rooms'] = 0
+
+    response = make_app().test_client().get(f"/building/{building['id']}")
+    assert response.status_code == 200
+    assert b'Room 5000' in response.data
+
+
+def test_only_buildings_with_rooms_show_fully_booked(db, make_app):
+    _building(db, 'Empty Tower')
+    booked = _building(db, 'Booked Tower')
+    _room(db, booked['id'], 5000, ['Wifi'], status='booked')
+    open_ = _building(db, 'Open Tower')
+    _room(db, open_['id'], 7000, ['Wifi'])
+
+    # A search renders each building once, without the random featured picks.
+    page = make_app().test_client().get('/?q=Tower').get_data(as_text=True)
+    assert page.count('Fully booked') == 1
+    assert '1 room available from ₹7000' in page
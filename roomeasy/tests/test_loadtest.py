@@ -0,0 +1,25 @@
+import loadtest
+
+
+def _transport(**config):
+    flask_app = loadtest.create_seeded_app(users=5, buildings=2, SESSION_STORE='memory', **config)
+    return loadtest.TestClientTransport(flask_app)
+
+
+def test_redirect_home_with_flashed_error_is_a_failure():
+    transport = _transport()
+    result = transport.request('GET', '/building/999')
+    assert result.status == 200
+    assert loadtest.lands_on('/building/999')(result) == "ended on /"
+
+    result = transport.request('POST', '/login', {'email': 'user1@example.com', 'password': 'wrong'})
+    assert loadtest.lands_on('/')(result) == "ended on /login"
+
+
+def test_scenario_steps_succeed():
+    transport = _transport()
+    db = loadtest.roomeasy.get_supabase(transport.client.application)
+    vu = loadtest.VirtualUser(transport, db, loadtest.Stats(), 1, 0)
+    vu.run('booker')
+    assert vu.stats.errors == {}
+    assert len(vu.stats.samples) == 1 + len(loadtest._booker_steps(vu))
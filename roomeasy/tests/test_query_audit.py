@@ -0,0 +1,35 @@
+from loadtest import seed
+from query_audit import TrackedRow, _describe, _label, analyse, crawl
+
+
+def test_crawl_is_within_budget():
+    auditor = crawl()
+    assert auditor.routes
+    assert auditor.failures() == []
+
+
+def test_ranking_pools_hold_plain_rows(db, make_app):
+    seed(db, users=5, buildings=3)
+    app = make_app(QUERY_AUDIT=True)
+    app.test_client().get('/')
+    engine = app.extensions['ranking']
+    assert app.extensions['query_audit'].routes['index']
+    assert engine._global.buildings
+    assert not any(isinstance(b, TrackedRow) for b in engine._global.buildings)
+
+
+def test_label_includes_modifiers(db):
+    query = db.table('bookings').select("*").eq('user_id', 'u1').order('created_at', desc=True).limit(1)
+    assert _label(_describe(query, [])) == "bookings.select('*').eq(user_id).order(created_at, desc).limit(1)"
+    query = db.table('buildings').select("id").order('id').range(1000, 1999)
+    assert _label(_describe(query, [])) == "buildings.select('id').order(id).range(1000, 1999)"
+    query = db.table('rooms').select("*").eq('id', 1).single()
+    assert _label(_describe(query, [])) == "rooms.select('*').eq(id).single()"
+
+
+def test_id_list_lookup_is_bounded(db):
+    by_ids = db.table('rooms').select("*").in_('id', [1, 2])
+    by_owner = db.table('rooms').select("*").in_('owner_id', ['u1'])
+    findings = analyse([_describe(by_ids, []), _describe(by_owner, [])])
+    assert [rule for rule, _ in findings] == ['unbounded']
+    assert 'in(owner_id)' in findings[0][1]
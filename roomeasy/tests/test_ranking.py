@@ -0,0 +1,75 @@
+import time
+
+from localdb import LocalClient
+from ranking import RankingEngine
+
+
+def _seed(db, n):
+    for i in range(n):
+        city = 'Pune' if i % 2 else 'Delhi'
+        db.table('buildings').insert({'title': f'B{i}', 'city': city, 'address': f'{i}, {city}',
+                                      'image_url': '', 'available_rooms': 1}).execute()
+
+
+def test_refresh_reads_every_page():
+    db = LocalClient()
+    _seed(db, 7)
+    engine = RankingEngine(lambda: db, pool_size=50)
+    engine.PAGE_SIZE = 3
+    queries_before = db.query_count
+    engine.refresh()
+    assert len(engine._global.buildings) == 7
+    assert db.query_count - queries_before == 3
+
+
+def test_pick_prefers_searched_city_and_excludes():
+    db = LocalClient()
+    _seed(db, 20)
+    engine = RankingEngine(lambda: db)
+    featured = engine.pick(5)
+    assert len({b['id'] for b in featured}) == 5
+
+    picks = engine.pick(8, location='pune', exclude=[b['id'] for b in featured])
+    assert len(picks) == 8
+    assert not {b['id'] for b in picks} & {b['id'] for b in featured}
+    pune = [b for b in picks if b['city'] == 'Pune']
+    # Pune has 10 buildings; at most 5 can be excluded by the featured picks.
+    assert len(pune) >= 5
+
+
+def test_invalidate_refreshes_in_background():
+    db = LocalClient()
+    _seed(db, 2)
+    engine = RankingEngine(lambda: db, ttl=3600)
+    assert len(engine.pick(10)) == 2
+
+    _seed(db, 1)
+    engine.invalidate()
+    deadline = time.monotonic() + 2
+    while len(engine.pick(10)) != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(engine.pick(10)) == 3
+
+
+def test_failing_client_is_retried_in_background_not_per_request():
+    db = LocalClient()
+    _seed(db, 3)
+    calls = []
+
+    def get_client():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("view missing")
+        return db
+
+    engine = RankingEngine(get_client, ttl=3600)
+    engine.RETRY_DELAY = 0.05
+    for _ in range(5):
+        assert engine.pick(5) == []
+    assert len(calls) <= 2
+
+    # The background thread keeps retrying and fills the pools once it can.
+    deadline = time.monotonic() + 2
+    while len(engine.pick(5)) != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(engine.pick(5)) == 3
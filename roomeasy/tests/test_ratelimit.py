@@ -0,0 +1,106 @@
+from ratelimit import BackendUnavailable, MemoryBackend
+
+
+def test_memory_backend_refills_over_time():
+    backend = MemoryBackend()
+    assert backend.take('k', rate=1, burst=2, now=0) == (True, 0)
+    assert backend.take('k', rate=1, burst=2, now=0) == (True, 0)
+    allowed, retry_after = backend.take('k', rate=1, burst=2, now=0)
+    assert not allowed
+    assert retry_after == 1
+
+    # Half a token after 0.5s isn't enough; a full one after 1s is.
+    allowed, retry_after = backend.take('k', rate=1, burst=2, now=0.5)
+    assert not allowed
+    assert retry_after == 0.5
+    assert backend.take('k', rate=1, burst=2, now=1.0) == (True, 0)
+
+
+def test_memory_backend_caps_at_burst():
+    backend = MemoryBackend()
+    backend.take('k', rate=1, burst=2, now=0)
+    assert backend.take('k', rate=1, burst=2, now=1000) == (True, 0)
+    assert backend.take('k', rate=1, burst=2, now=1000) == (True, 0)
+    assert not backend.take('k', rate=1, burst=2, now=1000)[0]
+
+
+def test_memory_backend_keys_are_independent():
+    backend = MemoryBackend()
+    assert backend.take('a', rate=1, burst=1, now=0)[0]
+    assert not backend.take('a', rate=1, burst=1, now=0)[0]
+    assert backend.take('b', rate=1, burst=1, now=0)[0]
+
+
+def test_over_budget_returns_429_with_retry_after(make_app):
+    app = make_app(RATE_LIMITS={'locations': (0.5, 2)})
+    client = app.test_client()
+    assert client.get('/api/locations').status_code == 200
+    assert client.get('/api/locations').status_code == 200
+
+    response = client.get('/api/locations')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    assert response.json == {'status': 'error', 'message': 'Too many requests'}
+    assert app.extensions['limiter'].stats()['locations']['limited'] == 1
+
+
+def test_html_route_gets_plain_429(make_app):
+    app = make_app(RATE_LIMITS={'search': (1, 1)})
+    client = app.test_client()
+    assert client.get('/?q=pune').status_code == 200
+    response = client.get('/?q=pune')
+    assert response.status_code == 429
+    assert response.mimetype == 'text/plain'
+    assert 'Retry-After' in response.headers
+    # Only searches are limited.
+    assert client.get('/').status_code == 200
+
+
+def test_forwarded_for_separates_clients(make_app):
+    app = make_app(RATE_LIMITS={'locations': (1, 1)}, TRUSTED_PROXY_HOPS=1)
+    client = app.test_client()
+    headers_a = {'X-Forwarded-For': '203.0.113.1'}
+    headers_b = {'X-Forwarded-For': '203.0.113.2'}
+    assert client.get('/api/locations', headers=headers_a).status_code == 200
+    assert client.get('/api/locations', headers=headers_a).status_code == 429
+    assert client.get('/api/locations', headers=headers_b).status_code == 200
+
+
+def test_forwarded_for_ignored_without_trusted_proxy(make_app):
+    app = make_app(RATE_LIMITS={'locations': (1, 1)})
+    client = app.test_client()
+    assert client.get('/api/locations', headers={'X-Forwarded-For': '203.0.113.1'}).status_code == 200
+    assert client.get('/api/locations', headers={'X-Forwarded-For': '203.0.113.2'}).status_code == 429
+
+
+def test_backend_outage_fails_open(make_app):
+    class DownBackend:
+        def take(self, key, rate, burst, now=None):
+            raise BackendUnavailable("connection refused")
+
+    app = make_app(RATE_LIMITS={'locations': (1, 1)})
+    app.extensions['limiter'].backend = DownBackend()
+    client = app.test_client()
+    assert client.get('/api/locations').status_code == 200
+    assert client.get('/api/locations').status_code == 200
+    assert app.extensions['limiter'].stats()['locations']['backend_errors'] == 2
+
+
+def test_refused_request_does_not_spend_user_tokens(make_app):
+    app = make_app(RATE_LIMITS={'wishlist': (0.001, 1)})
+    limiter = app.extensions['limiter']
+    taken = []
+    real_take = limiter.backend.take
+
+    def spy(key, rate, burst, now=None):
+        taken.append(key)
+        return real_take(key, rate, burst, now)
+
+    limiter.backend.take = spy
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user'] = 'u1'
+    client.post('/toggle_wishlist/1')
+    assert client.post('/toggle_wishlist/1').status_code == 429
+    # First request: ip + user bucket. Second: refused by the ip bucket alone.
+    assert [k.split(':')[1] for k in taken] == ['ip', 'user', 'ip']
@@ -0,0 +1,95 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from markupsafe import Markup
+from flask.sessions import SecureCookieSessionInterface
+
+from sessions import MemoryStore, SQLiteStore, ServerSideSessionInterface
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / 'sessions.sqlite3'))
+
+
+def test_sqlite_store_keeps_no_connection_from_init(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'sessions.sqlite3'))
+    assert getattr(store._local, 'conn', None) is None
+
+
+def test_flashes_and_tagged_values_round_trip(store, make_app):
+    app = make_app()
+    app.session_interface = ServerSideSessionInterface(store)
+    seen = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_flashes'] = [('error', 'Invalid email or password')]
+        sess['note'] = Markup('<b>hi</b>')
+        sess['seen'] = seen
+
+    response = client.get('/login')
+    assert b'flash-msg flash-error">Invalid email or password' in response.data
+    with client.session_transaction() as sess:
+        assert '_flashes' not in sess
+        assert sess['note'] == Markup('<b>hi</b>') and isinstance(sess['note'], Markup)
+        assert sess['seen'] == seen
+
+
+def test_reads_extend_idle_expiry(store, make_app):
+    app = make_app()
+    app.session_interface = ServerSideSessionInterface(store)
+    lifetime = app.permanent_session_lifetime.total_seconds()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_location'] = 'Pune'
+    sid = client.get_cookie('session').value
+
+    # As if the session was last saved two hours ago.
+    store.touch(sid, time.time() + lifetime - 2 * 3600)
+    client.get('/login')
+    assert store.load(sid)[1] == pytest.approx(time.time() + lifetime, abs=60)
+
+    # Within TOUCH_INTERVAL of the last refresh, a read doesn't write.
+    store.touch(sid, time.time() + lifetime - 60)
+    client.get('/login')
+    assert store.load(sid)[1] == pytest.approx(time.time() + lifetime - 60, abs=5)
+
+
+def _users(db):
+    admin = db.table('user_profiles').insert({'email': 'a@example.com', 'password': 'pw', 'full_name': 'A',
+                                              'role': 'admin', 'is_verified': True}).execute().data[0]
+    user = db.table('user_profiles').insert({'email': 'u@example.com', 'password': 'pw', 'full_name': 'U',
+                                             'role': 'user', 'is_verified': True}).execute().data[0]
+    return admin, user
+
+
+def test_role_change_signs_user_out(db, make_app):
+    app = make_app()
+    admin, user = _users(db)
+    admin_client, user_client = app.test_client(), app.test_client()
+    admin_client.post('/login', data={'email': 'a@example.com', 'password': 'pw'})
+    user_client.post('/login', data={'email': 'u@example.com', 'password': 'pw'})
+    with user_client.session_transaction() as sess:
+        assert sess['user'] == user['id']
+
+    admin_client.post(f"/admin/toggle-role/{user['id']}")
+    assert db.tables['user_profiles'][1]['role'] == 'admin'
+    with user_client.session_transaction() as sess:
+        assert 'user' not in sess
+    with admin_client.session_transaction() as sess:
+        assert sess['user'] == admin['id']
+
+
+def test_role_change_without_a_session_store(db, make_app):
+    app = make_app()
+    app.session_interface = SecureCookieSessionInterface()
+    _, user = _users(db)
+    client = app.test_client()
+    client.post('/login', data={'email': 'a@example.com', 'password': 'pw'})
+
+    response = client.post(f"/admin/toggle-role/{user['id']}", follow_redirects=True)
+    assert db.tables['user_profiles'][1]['role'] == 'admin'
+    assert b'User role changed to admin.' in response.data